@@ -3,15 +3,28 @@ CLI for stream_metadata.py
 """
 
 import argparse
-import sys
+import functools
 import atexit
-from typing import Dict, Any
+from typing import List, Optional
 
 from ..core.stream import Stream, StreamConfig
 from ..utils.process import write_pid_file, cleanup_pid_file, is_instance_running
 
-def parse_args():
-    """Parse command line arguments"""
+# On/off switches as (flag, help) pairs
+_BOOL_FLAGS = (
+    ('--audio_monitor', 'Enable audio monitoring'),
+    ('--metadata_monitor', 'Enable metadata monitoring'),
+    ('--audio_metrics', 'Enable audio metrics'),
+    ('--no_buffer', 'Disable buffering'),
+    ('--debug', 'Enable debug mode'),
+    ('--test', 'Enable test mode'),
+    ('--ffmpeg_debug', 'Enable FFmpeg debug output'),
+    ('--force', 'Force start even if another instance is running'),
+)
+
+@functools.lru_cache(maxsize=1)
+def _build_parser() -> argparse.ArgumentParser:
+    """Build the argument parser (once per process)"""
     parser = argparse.ArgumentParser(description='Stream Metadata Monitor')
     
     # Required arguments
@@ -19,20 +32,18 @@ def parse_args():
     
     # Optional arguments
     parser.add_argument('--stream_id', help='Stream ID (defaults to mount point from URL)')
-    parser.add_argument('--audio_monitor', action='store_true', help='Enable audio monitoring')
-    parser.add_argument('--metadata_monitor', action='store_true', help='Enable metadata monitoring')
-    parser.add_argument('--audio_metrics', action='store_true', help='Enable audio metrics')
-    parser.add_argument('--no_buffer', action='store_true', help='Disable buffering')
-    parser.add_argument('--debug', action='store_true', help='Enable debug mode')
-    parser.add_argument('--test', action='store_true', help='Enable test mode')
-    parser.add_argument('--ffmpeg_debug', action='store_true', help='Enable FFmpeg debug output')
-    parser.add_argument('--force', action='store_true', help='Force start even if another instance is running')
+    for flag, help_text in _BOOL_FLAGS:
+        parser.add_argument(flag, action='store_true', help=help_text)
     
-    return parser.parse_args()
+    return parser
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command line arguments (defaults to sys.argv)"""
+    return _build_parser().parse_args(argv)
 
-def main():
-    """Main entry point"""
-    args = parse_args()
+def main(argv: Optional[List[str]] = None) -> int:
+    """Main entry point, returns the process exit status"""
+    args = parse_args(argv)
     
     # Extract mount from URL
     mount = args.url.split('/')[-1]
@@ -40,7 +51,7 @@ def main():
     # Check if instance is already running
     if not args.force and is_instance_running(mount):
         print(f"An instance is already running for {mount}. Use --force to override.")
-        sys.exit(1)
+        return 1
     
     # Write PID file
     write_pid_file(mount)
@@ -64,12 +75,12 @@ def main():
     # Create and start stream
     stream = Stream(config)
     try:
-        stream.start()
+        if not stream.start():
+            # Nothing to monitor; start() has already stopped the stream
+            return 1
         
-        # Keep main thread alive
-        while True:
-            import time
-            time.sleep(1)
+        # Keep main thread alive until the stream is stopped
+        stream.stop_flag.wait()
             
     except KeyboardInterrupt:
         print("\nStopping stream...")
@@ -77,7 +88,8 @@ def main():
     except Exception as e:
         print(f"Error: {e}")
         stream.stop()
-        sys.exit(1)
+        return 1
+    return 0
 
 if __name__ == '__main__':
-    main() 
\ No newline at end of file
+    raise SystemExit(main()) 
\ No newline at end of file
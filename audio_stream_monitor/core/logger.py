@@ -5,14 +5,26 @@ Structured logging setup for audio_stream_monitor
 import logging
 import json
 from datetime import datetime
-from typing import Any, Dict, Optional
+from typing import Dict, Optional
+
+# LogRecord attributes that are not copied into the JSON output
+_RESERVED_RECORD_KEYS = frozenset([
+    'timestamp', 'level', 'message', 'args', 'exc_info', 'exc_text', 'msg',
+    'created', 'msecs', 'relativeCreated', 'levelname', 'levelno', 'pathname',
+    'filename', 'module', 'funcName', 'lineno', 'processName', 'process',
+    'threadName', 'thread'
+])
+
+# StructuredLogger instances by logger name, so handlers are only attached once
+_loggers: Dict[str, 'StructuredLogger'] = {}
 
 class StructuredLogger:
     """Custom logger that outputs structured JSON logs"""
     
-    def __init__(self, name: str, log_file: str, friendly_log_file: Optional[str] = None):
+    def __init__(self, name: str, log_file: str, friendly_log_file: Optional[str] = None,
+                 level: int = logging.DEBUG):
         self.logger = logging.getLogger(name)
-        self.logger.setLevel(logging.DEBUG)
+        self.logger.setLevel(level)
         
         # Create formatters
         self.json_formatter = JsonFormatter()
@@ -36,22 +48,28 @@ class StructuredLogger:
         # Friendly log file if specified
         if friendly_log_file:
             friendly_handler = logging.FileHandler(friendly_log_file)
+            # Per-line debug records stay in the JSON log only
+            friendly_handler.setLevel(logging.INFO)
             friendly_handler.setFormatter(self.friendly_formatter)
             self.logger.addHandler(friendly_handler)
     
     def setup_console_handler(self):
         """Set up console handler for logging"""
         console_handler = logging.StreamHandler()
+        console_handler.setLevel(logging.WARNING)
         console_handler.setFormatter(self.friendly_formatter)
         self.logger.addHandler(console_handler)
     
+    def isEnabledFor(self, level: int) -> bool:
+        """Check whether a record at this level would be emitted"""
+        return self.logger.isEnabledFor(level)
+    
     def _log(self, level: int, msg: str, **kwargs):
         """Internal logging method"""
-        extra = {
-            'timestamp': datetime.now().isoformat(),
-            **kwargs
-        }
-        self.logger.log(level, msg, extra=extra)
+        # Skip building the extra fields for records that would be dropped
+        if not self.logger.isEnabledFor(level):
+            return
+        self.logger.log(level, msg, extra=kwargs)
     
     def debug(self, msg: str, **kwargs):
         self._log(logging.DEBUG, msg, **kwargs)
@@ -73,16 +91,16 @@ class JsonFormatter(logging.Formatter):
     
     def format(self, record: logging.LogRecord) -> str:
         """Format the log record as JSON"""
-        # Create the base log object
+        # Create the base log object, timestamped from the record's creation time
         log_obj = {
-            'timestamp': getattr(record, 'timestamp', datetime.now().isoformat()),
+            'timestamp': getattr(record, 'timestamp', None) or datetime.fromtimestamp(record.created).isoformat(),
             'level': record.levelname,
             'message': record.getMessage(),
         }
         
         # Add any extra fields
         for key, value in record.__dict__.items():
-            if key not in ['timestamp', 'level', 'message', 'args', 'exc_info', 'exc_text', 'msg', 'created', 'msecs', 'relativeCreated', 'levelname', 'levelno', 'pathname', 'filename', 'module', 'funcName', 'lineno', 'processName', 'process', 'threadName', 'thread']:
+            if key not in _RESERVED_RECORD_KEYS:
                 log_obj[key] = value
         
         # Add exception info if present
@@ -91,6 +109,12 @@ class JsonFormatter(logging.Formatter):
         
         return json.dumps(log_obj)
 
-def get_logger(name: str, log_file: str, friendly_log_file: Optional[str] = None) -> StructuredLogger:
-    """Get a configured logger instance"""
-    return StructuredLogger(name, log_file, friendly_log_file) 
\ No newline at end of file
+def get_logger(name: str, log_file: str, friendly_log_file: Optional[str] = None,
+               level: int = logging.DEBUG) -> StructuredLogger:
+    """Get a configured logger instance (cached per name)"""
+    structured_logger = _loggers.get(name)
+    if structured_logger is None:
+        structured_logger = _loggers[name] = StructuredLogger(name, log_file, friendly_log_file, level)
+    elif structured_logger.logger.level != level:
+        structured_logger.logger.setLevel(level)
+    return structured_logger 
\ No newline at end of file
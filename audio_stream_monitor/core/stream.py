@@ -2,20 +2,88 @@
 Core stream handling functionality
 """
 
+import atexit
+import functools
+from collections import deque
 import subprocess
-import time
-from typing import Dict, Optional, List, Any
+from typing import Dict, Optional, Any
 from datetime import datetime
 import re
 import json
 import os
-import hashlib
-import uuid
 import logging
 import sys
+import threading
+
+try:
+    import orjson
+except ImportError:  # Optional, serialization falls back to the json module
+    orjson = None
 
 from .logger import get_logger
 
+# Minimum number of seconds between writes of the stream JSON file
+JSON_FLUSH_INTERVAL = 2.0
+
+# Number of events kept in metadata.history
+HISTORY_SIZE = 10
+
+# Seconds to wait before respawning an FFmpeg process that exited
+RESTART_DELAY = 1.0
+
+# Read buffer size for FFmpeg output pipes
+PIPE_BUFFER_SIZE = 1 << 16
+
+# Prefilter for raw FFmpeg output lines that can carry a stream title
+_STREAMTITLE_RE = re.compile(b'streamtitle', re.IGNORECASE)
+
+# Title extraction for the supported metadata line formats
+_TITLE_RE = re.compile(
+    r"metadata update for streamtitle:(?P<update>.*)"
+    r"|streamtitle=(?P<icy>[^;]*)"
+    r"|title=(?P<title>.*)",
+    re.IGNORECASE
+)
+
+# Audio properties reported on FFmpeg's stream info line
+_CODEC_RE = re.compile(r"Audio: (mp3|aac)")
+_SAMPLE_RATE_RE = re.compile(r"(\d+) Hz")
+_BITRATE_RE = re.compile(r"(\d+) kb/s")
+_CHANNELS_RE = re.compile(r"stereo|mono", re.IGNORECASE)
+
+# Display block section headers
+_HDR_AUDIO = "\U0001F3A7 Audio:\n"
+_HDR_NOW_PLAYING = "\U0001F3B5 Now Playing:\n"
+_HDR_HISTORY = f"\nHistory (last {HISTORY_SIZE}):\n"
+_DISPLAY_SEPARATOR = "\n" + "=" * 50
+
+@functools.lru_cache(maxsize=32)
+def _format_audio_section(codec: str, bitrate: int, sample_rate: int, channels: str) -> str:
+    """Format the Audio display section (cached, audio properties rarely change)"""
+    return (
+        _HDR_AUDIO
+        + f"   Codec: {codec}\n"
+        + f"   Bitrate: {bitrate} kbps\n"
+        + f"   Sample Rate: {sample_rate} Hz\n"
+        + f"   Channels: {channels}\n"
+    )
+
+def _dump_json(data: Dict[str, Any]) -> bytes:
+    """Serialize the stream JSON state (history is held in a deque)"""
+    if orjson is not None:
+        return orjson.dumps(data, default=list, option=orjson.OPT_INDENT_2)
+    return json.dumps(data, indent=2, default=list, ensure_ascii=False).encode('utf-8')
+
+def _load_json(raw: bytes) -> Dict[str, Any]:
+    """Parse stream JSON state read from disk"""
+    if orjson is not None:
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+def _format_history_line(event: Dict[str, Any]) -> str:
+    """Format a history event for the display block"""
+    return f"  [{event['timestamp']}] {event['artist']} - {event['title']}"
+
 class StreamConfig:
     """Configuration for a stream"""
     
@@ -72,21 +140,53 @@ class Stream:
         self.display_logger.addHandler(file_handler)
         self.display_logger.propagate = False
         
-        # Set up regular logger for debug/error logs
+        # Set up regular logger for debug/error logs (debug records only with --debug)
         self.logger = get_logger(
             f"stream_{config.stream_id}",
             f"data/logs/{config.stream_id}.log",
-            friendly_log_path
+            friendly_log_path,
+            logging.DEBUG if config.flags.get('debug') else logging.INFO
         )
         
         # Initialize state
         self.current_song = None
+        self._current_key = None
         self.last_metadata = None
         self.metadata_process = None
         self.audio_process = None
-        self.stop_flag = False
+        self.stop_flag = threading.Event()
         self.tail_process = None
         
+        # In-memory copy of the stream JSON, loaded once in start()
+        self.json_path = f"data/json/{config.stream_id}.json"
+        self._json_data = None
+        self._json_lock = threading.Lock()
+        # Held from snapshot to os.replace so disk writes never overlap and land in order
+        self._json_write_lock = threading.Lock()
+        self._json_dirty = threading.Event()
+        # Wakes the writer thread, for pending changes or for stop()
+        self._json_wake = threading.Event()
+        self._json_writer_thread = None
+        # (title, artist) keys of the events in metadata.history
+        self._history_keys = set()
+        
+        # FFmpeg command lines only depend on the config; build them once for start and respawn
+        self._metadata_cmd = self._build_ffmpeg_cmd(
+            'verbose',  # ICY "Metadata update" lines are logged at verbose
+            '-headers', 'Icy-MetaData: 1\r\nIcy-MetaInt: 16000',
+            '-reconnect', '1',
+            '-reconnect_streamed', '1',
+            '-reconnect_delay_max', '5',
+            '-i', config.url,
+            '-c', 'copy',  # Metadata only, no need to decode the audio
+            '-f', 'null',
+            '-'
+        )
+        playback = ('-ac', '2', '-ar', '44100', 'default')  # Force stereo 44.1kHz output
+        self._audio_pulse_cmd = self._build_ffmpeg_cmd('info', '-i', config.url, '-f', 'pulse', *playback)
+        self._audio_alsa_cmd = self._build_ffmpeg_cmd('info', '-i', config.url, '-f', 'alsa', *playback)
+        self._audio_null_cmd = self._build_ffmpeg_cmd('info', '-i', config.url, '-f', 'null', '-')
+        
         # Start tailing the friendly log if not in silent mode
         if not self.config.flags.get('silent'):
             self.tail_process = subprocess.Popen(['tail', '-n', '+1', '-f', friendly_log_path])
@@ -94,18 +194,23 @@ class Stream:
             sys.stdout = open('/dev/null', 'w')
             sys.stderr = open('/dev/null', 'w')
     
-    def start(self):
-        """Start the stream monitoring"""
+    def start(self) -> bool:
+        """Start the stream monitoring, returning False if no monitor is enabled"""
         self.logger.info("Starting stream monitoring", 
                         url=self.config.url,
                         stream_id=self.config.stream_id)
         
+        # Without a monitor nothing would ever update the stream state
+        if not (self.config.flags.get('metadata_monitor') or self.config.flags.get('audio_monitor')):
+            self.logger.warning("No monitors enabled (use --metadata_monitor and/or --audio_monitor)")
+            self.stop()
+            return False
+        
         # Initialize JSON file
-        json_path = f"data/json/{self.config.stream_id}.json"
         try:
             # Try to load existing JSON
-            with open(json_path, 'r') as f:
-                json_data = json.load(f)
+            with open(self.json_path, 'rb') as f:
+                json_data = _load_json(f.read())
         except (FileNotFoundError, json.JSONDecodeError):
             # Initialize new JSON structure if file doesn't exist
             json_data = {
@@ -117,7 +222,7 @@ class Stream:
                 "stream": {
                     "url": self.config.url,
                     "mount": self.config.stream_id,
-                    "json_path": json_path,
+                    "json_path": self.json_path,
                     "log_path": f"data/logs/{self.config.stream_id}_friendly.log",
                     "adv_log_path": f"data/logs/{self.config.stream_id}.log",
                     "audio_properties": {
@@ -144,13 +249,31 @@ class Stream:
         # Update stream info
         json_data["stream"]["url"] = self.config.url
         json_data["stream"]["mount"] = self.config.stream_id
-        json_data["stream"]["json_path"] = json_path
+        json_data["stream"]["json_path"] = self.json_path
         json_data["stream"]["log_path"] = f"data/logs/{self.config.stream_id}_friendly.log"
         json_data["stream"]["adv_log_path"] = f"data/logs/{self.config.stream_id}.log"
         
-        # Save updated JSON
-        with open(json_path, 'w') as f:
-            json.dump(json_data, f, indent=2)
+        # Keep the state in memory so monitors don't re-read the file per event
+        with self._json_lock:
+            self._json_data = json_data
+            metadata_section = json_data.setdefault('metadata', {'current': None})
+            history = deque(metadata_section.get('history', [])[:HISTORY_SIZE], maxlen=HISTORY_SIZE)
+            metadata_section['history'] = history
+            self._history_keys = {
+                (event.get('title'), event.get('artist'))
+                for event in history
+            }
+        with self._json_write_lock:
+            self._write_json(_dump_json(json_data))
+        
+        # Write later updates from a background thread, coalescing bursts
+        self._json_writer_thread = threading.Thread(
+            target=self._json_writer,
+            daemon=True
+        )
+        self._json_writer_thread.start()
+        # Don't lose a pending update if the process exits without stop()
+        atexit.register(self._flush_json)
         
         # Start metadata monitoring if enabled
         if self.config.flags.get('metadata_monitor'):
@@ -159,21 +282,34 @@ class Stream:
         # Start audio monitoring if enabled
         if self.config.flags.get('audio_monitor'):
             self.start_audio_monitor()
+        return True
     
     def stop(self):
         """Stop the stream monitoring"""
         self.logger.info("Stopping stream monitoring")
-        self.stop_flag = True
+        self.stop_flag.set()
         
-        # Stop metadata process
-        if self.metadata_process:
-            self.metadata_process.terminate()
-            self.metadata_process = None
-        
-        # Stop audio process
-        if self.audio_process:
-            self.audio_process.terminate()
-            self.audio_process = None
+        # Signal the FFmpeg processes together, then reap them
+        processes = [p for p in (self.metadata_process, self.audio_process) if p]
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            try:
+                process.wait(timeout=1)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+        self.metadata_process = None
+        self.audio_process = None
+            
+        # Stop the JSON writer and flush any pending update
+        if self._json_writer_thread:
+            # Wake the writer without marking the state dirty
+            self._json_wake.set()
+            self._json_writer_thread.join(timeout=5)
+            self._json_writer_thread = None
+        atexit.unregister(self._flush_json)
+        self._flush_json()
             
         # Stop tail process
         if self.tail_process:
@@ -187,37 +323,9 @@ class Stream:
     def start_metadata_monitor(self):
         """Start the metadata monitoring process"""
         try:
-            # Build FFmpeg command
-            cmd = [
-                'ffmpeg',
-                '-hide_banner',
-                '-loglevel', 'debug' if self.config.flags.get('debug') else 'info',
-                '-headers', 'Icy-MetaData: 1\r\nIcy-MetaInt: 16000',
-                '-reconnect', '1',
-                '-reconnect_streamed', '1',
-                '-reconnect_delay_max', '5',
-                '-i', self.config.url,
-                '-f', 'null',
-                '-'
-            ]
-            
-            if self.config.flags.get('no_buffer'):
-                cmd[1:1] = ['-fflags', 'nobuffer']
-            
-            self.logger.debug("Starting metadata process", command=' '.join(cmd))
-            
-            # Start process with stderr redirected to stdout to capture metadata
-            self.metadata_process = subprocess.Popen(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                text=True,
-                bufsize=1,
-                universal_newlines=True
-            )
+            self.metadata_process = self._spawn_metadata_process()
             
             # Start monitoring thread
-            import threading
             self.metadata_thread = threading.Thread(
                 target=self._monitor_metadata,
                 daemon=True
@@ -227,85 +335,36 @@ class Stream:
         except Exception as e:
             self.logger.error("Failed to start metadata monitor", error=str(e))
     
+    def _build_ffmpeg_cmd(self, loglevel: str, *args: str) -> tuple:
+        """Build an FFmpeg command line, applying the ffmpeg_debug and no_buffer flags"""
+        cmd = [
+            'ffmpeg',
+            '-hide_banner',
+            '-nostats',  # Progress lines end in \r, not \n
+            '-loglevel', 'debug' if self.config.flags.get('ffmpeg_debug') else loglevel,
+        ]
+        if self.config.flags.get('no_buffer'):
+            cmd[1:1] = ['-fflags', 'nobuffer']
+        cmd.extend(args)
+        return tuple(cmd)
+    
+    def _spawn_metadata_process(self) -> subprocess.Popen:
+        """Start the FFmpeg process that reports stream metadata"""
+        self.logger.debug("Starting metadata process", command=' '.join(self._metadata_cmd))
+        
+        # Start process with stderr redirected to stdout to capture metadata
+        return subprocess.Popen(
+            self._metadata_cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            bufsize=PIPE_BUFFER_SIZE
+        )
+    
     def start_audio_monitor(self):
         """Start the audio monitoring process. If audio_monitor is enabled, play audio to speakers using PulseAudio, falling back to ALSA if PulseAudio fails. Otherwise, decode and discard audio as before."""
         try:
-            # Build FFmpeg command for playback
-            if self.config.flags.get('audio_monitor'):
-                # Try PulseAudio first
-                cmd_pulse = [
-                    'ffmpeg',
-                    '-hide_banner',
-                    '-loglevel', 'debug' if self.config.flags.get('debug') else 'info',
-                    '-i', self.config.url,
-                    '-f', 'pulse',
-                    '-ac', '2',  # Force stereo output
-                    '-ar', '44100',  # Force 44.1kHz sample rate
-                    'default'
-                ]
-                if self.config.flags.get('no_buffer'):
-                    cmd_pulse[1:1] = ['-fflags', 'nobuffer']
-                self.logger.debug("Starting audio process (PulseAudio)", command=' '.join(cmd_pulse))
-                try:
-                    self.audio_process = subprocess.Popen(
-                        cmd_pulse,
-                        stdout=subprocess.PIPE,
-                        stderr=subprocess.STDOUT,
-                        text=True,
-                        bufsize=1,
-                        universal_newlines=True
-                    )
-                    # Wait briefly to see if PulseAudio fails
-                    time.sleep(1)
-                    if self.audio_process.poll() is not None:
-                        raise RuntimeError("PulseAudio output failed, falling back to ALSA.")
-                except Exception as e:
-                    self.logger.warning("PulseAudio output failed, falling back to ALSA.", error=str(e))
-                    # Try ALSA fallback
-                    cmd_alsa = [
-                        'ffmpeg',
-                        '-hide_banner',
-                        '-loglevel', 'debug' if self.config.flags.get('debug') else 'info',
-                        '-i', self.config.url,
-                        '-f', 'alsa',
-                        '-ac', '2',  # Force stereo output
-                        '-ar', '44100',  # Force 44.1kHz sample rate
-                        'default'
-                    ]
-                    if self.config.flags.get('no_buffer'):
-                        cmd_alsa[1:1] = ['-fflags', 'nobuffer']
-                    self.logger.debug("Starting audio process (ALSA fallback)", command=' '.join(cmd_alsa))
-                    self.audio_process = subprocess.Popen(
-                        cmd_alsa,
-                        stdout=subprocess.PIPE,
-                        stderr=subprocess.STDOUT,
-                        text=True,
-                        bufsize=1,
-                        universal_newlines=True
-                    )
-            else:
-                # Just decode and discard audio
-                cmd = [
-                    'ffmpeg',
-                    '-hide_banner',
-                    '-loglevel', 'debug' if self.config.flags.get('debug') else 'info',
-                    '-i', self.config.url,
-                    '-f', 'null',
-                    '-'
-                ]
-                if self.config.flags.get('no_buffer'):
-                    cmd[1:1] = ['-fflags', 'nobuffer']
-                self.logger.debug("Starting audio process (no playback)", command=' '.join(cmd))
-                self.audio_process = subprocess.Popen(
-                    cmd,
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.STDOUT,
-                    text=True,
-                    bufsize=1,
-                    universal_newlines=True
-                )
+            self.audio_process = self._spawn_audio_process()
             # Start monitoring thread
-            import threading
             self.audio_thread = threading.Thread(
                 target=self._monitor_audio,
                 daemon=True
@@ -314,244 +373,305 @@ class Stream:
         except Exception as e:
             self.logger.error("Failed to start audio monitor", error=str(e))
     
-    def _monitor_metadata(self):
-        """Monitor thread for metadata updates"""
-        while not self.stop_flag:
+    def _spawn_audio_process(self) -> subprocess.Popen:
+        """Start the FFmpeg audio process, playing to speakers if audio_monitor is enabled"""
+        if self.config.flags.get('audio_monitor'):
+            # Try PulseAudio first
+            self.logger.debug("Starting audio process (PulseAudio)", command=' '.join(self._audio_pulse_cmd))
             try:
-                if not self.metadata_process:
-                    break
-                    
-                line = self.metadata_process.stdout.readline()
-                if not line:
-                    time.sleep(0.1)
-                    continue
-                
-                line = line.strip()
-                # Log the actual content of the line
-                self.logger.debug("Raw line from FFmpeg", line=line, raw_line=repr(line))
-                
-                # Try to extract metadata from various formats
-                metadata = None
-                
-                # Check for any metadata indicators
-                if any(pattern in line.lower() for pattern in [
-                    'streamtitle', 'icy-metadata', 'title=', 'artist=',
-                    'metadata update for', 'icy-meta:', 'icy-name:',
-                    'audio:', 'stream #0:0'
-                ]):
-                    # Handle regular song metadata
-                    if 'streamtitle' in line.lower():
-                        try:
-                            title = None
-                            is_ad = False
-                            # Log the raw line for debugging
-                            self.logger.debug("Processing metadata line", line=line)
-                            # Check for regular metadata
-                            if 'metadata update for streamtitle:' in line.lower():
-                                title = line.split(':', 2)[-1].strip()
-                            elif 'streamtitle=' in line.lower():
-                                title = line.split('streamtitle=')[1].split(';')[0].strip("'")
-                            elif 'icy-meta: streamtitle=' in line.lower():
-                                title = line.split('streamtitle=')[1].split(';')[0].strip("'")
-                            elif 'title=' in line.lower():
-                                title = line.split('title=')[1].strip()
-                            
-                            # Clean up the title
-                            if title:
-                                title = title.strip(' -').strip('"\'')  # Remove quotes and extra spaces
-                                if title and title.lower() not in ['none', 'null', '']:
-                                    self.logger.debug("Extracted title", title=title)
-                                    metadata = {
-                                        "title": title,
-                                        "type": "song",
-                                        "timestamp": datetime.now().isoformat()
-                                    }
-                                    self._process_metadata(metadata)
-                                    self.logger.info("Processed metadata", metadata=metadata)
-                                else:
-                                    self.logger.debug("Ignoring empty title", title=title)
-                        except Exception as e:
-                            self.logger.error("Metadata parse error", 
-                                            error=str(e),
-                                            error_type=type(e).__name__,
-                                            line=line)
-                
+                process = subprocess.Popen(
+                    self._audio_pulse_cmd,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.STDOUT,
+                    bufsize=PIPE_BUFFER_SIZE
+                )
+                # Wait briefly to see if PulseAudio fails, returning as soon as it exits
+                try:
+                    process.wait(timeout=1)
+                except subprocess.TimeoutExpired:
+                    pass
+                else:
+                    raise RuntimeError("PulseAudio output failed, falling back to ALSA.")
             except Exception as e:
-                self.logger.error("Error in metadata monitor", error=str(e))
-                time.sleep(1)
+                self.logger.warning("PulseAudio output failed, falling back to ALSA.", error=str(e))
+                # Try ALSA fallback
+                self.logger.debug("Starting audio process (ALSA fallback)", command=' '.join(self._audio_alsa_cmd))
+                process = subprocess.Popen(
+                    self._audio_alsa_cmd,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.STDOUT,
+                    bufsize=PIPE_BUFFER_SIZE
+                )
+        else:
+            # Just decode and discard audio
+            self.logger.debug("Starting audio process (no playback)", command=' '.join(self._audio_null_cmd))
+            process = subprocess.Popen(
+                self._audio_null_cmd,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT,
+                bufsize=PIPE_BUFFER_SIZE
+            )
+        return process
+    
+    def _monitor_metadata(self):
+        """Monitor thread for metadata updates"""
+        self._supervise_process(
+            'metadata_process', self._spawn_metadata_process,
+            self._handle_metadata_line, "metadata monitor"
+        )
     
     def _monitor_audio(self):
         """Monitor thread for audio updates"""
-        while not self.stop_flag:
+        self._supervise_process(
+            'audio_process', self._spawn_audio_process,
+            self._handle_audio_line, "audio monitor"
+        )
+    
+    def _supervise_process(self, attr: str, spawn, handle_line, name: str):
+        """Read an FFmpeg process until it exits, then respawn it until stopped"""
+        while True:
+            self._read_process_output(getattr(self, attr), handle_line, name)
+            # Back off so a stream that keeps failing is not respawned in a tight loop
+            if self.stop_flag.wait(RESTART_DELAY):
+                break
+            self.logger.info("Restarting FFmpeg process", monitor=name)
             try:
-                if not self.audio_process:
+                process = spawn()
+            except Exception as e:
+                self.logger.error("Failed to restart FFmpeg process", monitor=name, error=str(e))
+                process = None
+            setattr(self, attr, process)
+            if process and self.stop_flag.is_set():
+                # stop() ran during the respawn and may not have seen this process
+                process.terminate()
+                process.wait()
+                break
+    
+    def _read_process_output(self, process, handle_line, name: str):
+        """Feed each output line of an FFmpeg process to handle_line until it exits"""
+        if not process:
+            return
+        try:
+            # Iterating the buffered pipe blocks until FFmpeg writes or exits
+            for line in process.stdout:
+                if self.stop_flag.is_set():
                     break
-                    
-                line = self.audio_process.stdout.readline()
-                if not line:
-                    time.sleep(0.1)
-                    continue
-                
-                line = line.strip()
-                self.logger.debug("Raw line from audio process", line=line)
-                
-                # Check for audio properties
-                if 'Stream #0:0' in line:
-                    try:
-                        # Extract audio properties
-                        if 'Audio:' in line:
-                            self.logger.debug("Found audio properties line", raw_line=line)
-                            parts = line.split('Audio:')[1].split(',')
-                            self.logger.debug("Split parts", parts=parts)
-                            for part in parts:
-                                part = part.strip()
-                                self.logger.debug("Processing part", part=part)
-                                if 'Hz' in part:
-                                    sample_rate = int(part.split('Hz')[0].strip())
-                                    self._update_audio_properties('sample_rate', sample_rate)
-                                elif 'kb/s' in part:
-                                    # Extract bitrate using the same method as before
-                                    bitrate_str = part.strip().split(' ')[0]
-                                    self.logger.debug("Found bitrate string", bitrate_str=bitrate_str, full_part=part, full_line=line)
-                                    try:
-                                        bitrate = int(bitrate_str)
-                                        # Only update if it's a reasonable bitrate value (e.g., 128, 192, 256)
-                                        if bitrate <= 320:  # Most common max bitrate for audio streams
-                                            self._update_audio_properties('bitrate', bitrate)
-                                        else:
-                                            self.logger.debug("Ignoring unusually high bitrate", bitrate=bitrate, full_line=line)
-                                    except ValueError:
-                                        self.logger.error("Failed to parse bitrate", bitrate_str=bitrate_str, full_line=line)
-                                elif 'stereo' in part.lower():
-                                    self._update_audio_properties('channels', 'stereo')
-                                elif 'mono' in part.lower():
-                                    self._update_audio_properties('channels', 'mono')
-                                elif part.startswith('mp3'):
-                                    self._update_audio_properties('codec', 'mp3')
-                                elif part.startswith('aac'):
-                                    self._update_audio_properties('codec', 'aac')
-                    except Exception as e:
-                        self.logger.error("Error parsing audio properties", error=str(e), full_line=line)
-                
+                try:
+                    handle_line(line.strip())
+                except Exception as e:
+                    self.logger.error("Error in FFmpeg monitor", monitor=name, error=str(e))
+        except (OSError, ValueError) as e:
+            # The pipe was closed underneath the reader, normally by stop()
+            if not self.stop_flag.is_set():
+                self.logger.error("Error in FFmpeg monitor", monitor=name, error=str(e))
+        if not self.stop_flag.is_set():
+            self.logger.warning("FFmpeg process exited", monitor=name, returncode=process.wait())
+    
+    def _handle_metadata_line(self, line: bytes):
+        """Extract metadata from a line of FFmpeg output"""
+        # Only StreamTitle lines carry song metadata, the rest is never decoded
+        if not _STREAMTITLE_RE.search(line):
+            return
+        line = line.decode('utf-8', 'replace')
+        # Log the actual content of the line (repr is only built when debugging)
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("Raw line from FFmpeg", line=line, raw_line=repr(line))
+        
+        # Try to extract metadata from various formats
+        metadata = None
+        
+        try:
+            title = None
+            is_ad = False
+            # Log the raw line for debugging
+            self.logger.debug("Processing metadata line", line=line)
+            # Check for regular metadata
+            match = _TITLE_RE.search(line)
+            if match:
+                title = match.group(match.lastgroup)
+                title = title.strip("'") if match.lastgroup == 'icy' else title.strip()
+            
+            # Clean up the title
+            if title:
+                title = title.strip(' -').strip('"\'')  # Remove quotes and extra spaces
+                if title and title.lower() not in ['none', 'null', '']:
+                    self.logger.debug("Extracted title", title=title)
+                    metadata = {
+                        "title": title,
+                        "type": "song",
+                        "timestamp": datetime.now().isoformat()
+                    }
+                    # Repeats are already logged at debug by _process_metadata
+                    if self._process_metadata(metadata):
+                        self.logger.info("Processed metadata", metadata=metadata)
+                else:
+                    self.logger.debug("Ignoring empty title", title=title)
+        except Exception as e:
+            self.logger.error("Metadata parse error", 
+                            error=str(e),
+                            error_type=type(e).__name__,
+                            line=line)
+    
+    def _handle_audio_line(self, line: bytes):
+        """Extract audio properties from a line of FFmpeg output"""
+        # Only the stream info line is decoded, the rest is dropped as raw bytes
+        if b'Stream #0:0' not in line:
+            return
+        line = line.decode('utf-8', 'replace')
+        self.logger.debug("Raw line from audio process", line=line)
+        
+        try:
+            if 'Audio:' not in line:
+                return
+            match = _CODEC_RE.search(line)
+            if match:
+                self._update_audio_properties('codec', match.group(1))
+            match = _SAMPLE_RATE_RE.search(line)
+            if match:
+                self._update_audio_properties('sample_rate', int(match.group(1)))
+            match = _BITRATE_RE.search(line)
+            if match:
+                bitrate = int(match.group(1))
+                # Only update if it's a reasonable bitrate value (e.g., 128, 192, 256)
+                if bitrate <= 320:  # Most common max bitrate for audio streams
+                    self._update_audio_properties('bitrate', bitrate)
+                else:
+                    self.logger.debug("Ignoring unusually high bitrate", bitrate=bitrate, full_line=line)
+            match = _CHANNELS_RE.search(line)
+            if match:
+                self._update_audio_properties('channels', match.group(0).lower())
+        except Exception as e:
+            self.logger.error("Error parsing audio properties", error=str(e), full_line=line)
+    
+    def _write_json(self, payload: bytes):
+        """Write serialized JSON state to disk (callers hold _json_write_lock)"""
+        # Replace the file in one step so readers never see a partial write;
+        # the pid keeps a second (--force) instance off this temp file
+        tmp_path = f"{self.json_path}.tmp.{os.getpid()}"
+        with open(tmp_path, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp_path, self.json_path)
+    
+    def _flush_json(self):
+        """Write the JSON state to disk if it changed since the last write"""
+        # The writer thread, stop() and the atexit hook can all flush at once
+        with self._json_write_lock:
+            with self._json_lock:
+                if not self._json_dirty.is_set() or self._json_data is None:
+                    return
+                self._json_dirty.clear()
+                # Serialize under the state lock, but keep disk I/O outside of it
+                payload = _dump_json(self._json_data)
+            try:
+                self._write_json(payload)
             except Exception as e:
-                self.logger.error("Error in audio monitor", error=str(e))
-                time.sleep(1)
+                self.logger.error("Error writing JSON", error=str(e))
+    
+    def _mark_json_dirty(self):
+        """Flag the JSON state as changed and wake the writer (callers hold _json_lock)"""
+        self._json_dirty.set()
+        self._json_wake.set()
+    
+    def _json_writer(self):
+        """Writer thread: flush JSON changes at most every JSON_FLUSH_INTERVAL seconds"""
+        while True:
+            self._json_wake.wait()
+            # Clear before flushing so changes made during the write wake us again
+            self._json_wake.clear()
+            if self.stop_flag.is_set():
+                break
+            self._flush_json()
+            # Let further updates accumulate before the next write
+            self.stop_flag.wait(JSON_FLUSH_INTERVAL)
     
     def _update_audio_properties(self, key: str, value: Any):
         """Update audio properties in JSON file"""
         try:
-            json_path = f"data/json/{self.config.stream_id}.json"
-            with open(json_path, 'r') as f:
-                json_data = json.load(f)
-            
-            # Update the property
-            json_data['stream']['audio_properties'][key] = value
-            
-            # Save updated JSON
-            with open(json_path, 'w') as f:
-                json.dump(json_data, f, indent=2)
+            with self._json_lock:
+                audio_properties = self._json_data['stream']['audio_properties']
+                # Nothing to write when the stream reports the same value again
+                if audio_properties.get(key) == value:
+                    return
+                
+                # Update the property
+                audio_properties[key] = value
+                
+                # Schedule a write of the updated JSON
+                self._mark_json_dirty()
             
             self.logger.debug("Updated audio property", key=key, value=value)
             
         except Exception as e:
             self.logger.error("Error updating audio properties", error=str(e))
     
-    def _process_metadata(self, metadata: Dict[str, Any]):
-        """Process new metadata"""
+    def _process_metadata(self, metadata: Dict[str, Any]) -> bool:
+        """Process new metadata, returning whether it was accepted as a new event"""
         try:
+            # Skip the JSON rewrite when the stream repeats the current event
+            metadata_key = (metadata.get('type'), metadata.get('title'), metadata.get('artist'))
+            if metadata_key == self._current_key:
+                self.logger.debug("Ignoring unchanged metadata", title=metadata.get('title'))
+                return False
+
             # Update current song
             self.current_song = metadata
+            self._current_key = metadata_key
             
-            # Load existing JSON if it exists
-            json_path = f"data/json/{self.config.stream_id}.json"
-            try:
-                with open(json_path, 'r') as f:
-                    json_data = json.load(f)
-            except (FileNotFoundError, json.JSONDecodeError):
-                # Initialize new JSON structure
-                json_data = {
-                    "server": {
-                        "started": datetime.now().isoformat(),
-                        "connection_status": "connected",
-                        "flags": self.config.flags
-                    },
-                    "stream": {
-                        "url": self.config.url,
-                        "mount": self.config.stream_id,
-                        "json_path": json_path,
-                        "log_path": f"data/logs/{self.config.stream_id}_friendly.log",
-                        "adv_log_path": f"data/logs/{self.config.stream_id}.log",
-                        "audio_properties": {
-                            "codec": "mp3",  # Default, will be updated when detected
-                            "sample_rate": 44100,  # Default, will be updated when detected
-                            "bitrate": 256,  # Default, will be updated when detected
-                            "channels": "stereo"  # Default, will be updated when detected
-                        }
-                    },
-                    "metadata": {
-                        "current": None,
-                        "history": []
-                    }
-                }
-                # Add stream ID if it exists and is different from mount
-                if self.config.stream_id and self.config.stream_id != self.config.url.split('/')[-1]:
-                    json_data["stream"]["id"] = self.config.stream_id
-
             # Create a simplified version for history without technical details
             history_metadata = {
-                'timestamp': datetime.now().isoformat(),
+                # Reuse the event timestamp rather than formatting the clock again
+                'timestamp': metadata.get('timestamp') or datetime.now().isoformat(),
                 'type': metadata.get('type', 'song'),
                 'title': metadata.get('title', ''),
                 'artist': metadata.get('artist', '')
             }
 
-            # Update current metadata
-            json_data["metadata"]["current"] = metadata
-            
-            # Add to history (keep last 10)
-            if 'metadata' not in json_data:
-                json_data['metadata'] = {}
-            if 'history' not in json_data['metadata']:
-                json_data['metadata']['history'] = []
-            
-            # Filter out duplicate songs before adding to history
-            history = json_data["metadata"]["history"]
-            if not any(
-                event['title'] == history_metadata['title'] and 
-                event['artist'] == history_metadata['artist']
-                for event in history
-            ):
-                history.insert(0, history_metadata)
-                history = history[:10]  # Keep last 10
-                json_data["metadata"]["history"] = history
-            
-            # Save updated JSON
-            with open(json_path, 'w') as f:
-                json.dump(json_data, f, indent=2)
+            with self._json_lock:
+                json_data = self._json_data
+
+                # Update current metadata (start() guarantees the metadata section)
+                json_data["metadata"]["current"] = metadata
+                
+                # Filter out duplicate songs before adding to history
+                history = json_data["metadata"]["history"]
+                history_key = (history_metadata['title'], history_metadata['artist'])
+                if history_key not in self._history_keys:
+                    # The deque drops the oldest event once full
+                    if len(history) == history.maxlen:
+                        evicted = history[-1]
+                        self._history_keys.discard((evicted.get('title'), evicted.get('artist')))
+                    history.appendleft(history_metadata)
+                    self._history_keys.add(history_key)
+                
+                # Schedule a write of the updated JSON
+                self._mark_json_dirty()
             
             # Log the change to display logger
+            config = self.config
+            stream_info = json_data['stream']
+            audio_properties = stream_info['audio_properties']
             self.display_logger.info(
                 f"Stream:\n"
-                f"   URL: {self.config.url}\n"
-                + (f"   ID: {self.config.stream_id}\n" if self.config.stream_id else "")
-                + f"   Mount: {self.config.stream_id}\n"
-                + f"   JSON: {json_path}\n"
-                + f"   Log: {json_data['stream']['log_path']}\n"
-                + f"\U0001F3A7 Audio:\n"
-                + f"   Codec: {json_data['stream']['audio_properties']['codec']}\n"
-                + f"   Bitrate: {json_data['stream']['audio_properties']['bitrate']} kbps\n"
-                + f"   Sample Rate: {json_data['stream']['audio_properties']['sample_rate']} Hz\n"
-                + f"   Channels: {json_data['stream']['audio_properties']['channels']}\n"
-                + f"\U0001F3B5 Now Playing:\n"
+                f"   URL: {config.url}\n"
+                + (f"   ID: {config.stream_id}\n" if config.stream_id else "")
+                + f"   Mount: {config.stream_id}\n"
+                + f"   JSON: {self.json_path}\n"
+                + f"   Log: {stream_info['log_path']}\n"
+                + _format_audio_section(
+                    audio_properties['codec'],
+                    audio_properties['bitrate'],
+                    audio_properties['sample_rate'],
+                    audio_properties['channels']
+                )
+                + _HDR_NOW_PLAYING
                 + f"   Artist: {metadata.get('artist', 'Unknown')}\n"
                 + f"   Title: {metadata.get('title', 'Unknown')}\n"
-                + f"\nHistory (last 10):\n"
-                + "\n".join(
-                    f"  [{event['timestamp']}] {event['artist']} - {event['title']}"
-                    for event in reversed(history)
-                )
-                + f"\n{'=' * 50}"
+                + _HDR_HISTORY
+                + "\n".join(map(_format_history_line, reversed(history)))
+                + _DISPLAY_SEPARATOR
             )
+            return True
             
         except Exception as e:
-            self.logger.error("Error processing metadata", error=str(e)) 
\ No newline at end of file
+            self.logger.error("Error processing metadata", error=str(e))
+            return False 
\ No newline at end of file
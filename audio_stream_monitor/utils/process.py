@@ -4,9 +4,8 @@ Process management utilities
 
 import os
 import signal
-import json
 import time
-from typing import Dict, List, Optional, Any
+from typing import List
 from pathlib import Path
 
 def get_pid_file_path(mount: str) -> str:
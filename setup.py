@@ -10,6 +10,9 @@ setup(
         "python-dotenv",
         "ffmpeg-python",
     ],
+    extras_require={
+        "fast": ["orjson"],
+    },
     entry_points={
         "console_scripts": [
             "stream-metadata=audio_stream_monitor.cli.stream_cli:main",